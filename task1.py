@@ -1,32 +1,50 @@
-from collections import UserDict
 from datetime import datetime, date, timedelta
-from typing import List, Optional, Dict, Tuple, Callable
+from operator import itemgetter
+from typing import List, Optional, Dict, Tuple, Callable, Set, Iterator
 import functools
+import os
+import pickle
+import re
+import sys
 
 
 # ============================
 # Базові поля та валідація
 # ============================
 
+_PHONE_RE = re.compile(r"\A\d{10}\Z")  # рівно 10 цифр, перевірка одним викликом
+
+
 class Field:
     """Базовий клас для полів запису (має лише value)."""
+    __slots__ = ("value",)
+
     def __init__(self, value: str):
         self.value = value
 
     def __str__(self) -> str:
         return str(self.value)
 
+    # Компактний стан для pickle: кортеж замість (None, {слот: значення})
+    def __getstate__(self) -> tuple:
+        return (self.value,)
+
+    def __setstate__(self, state: tuple) -> None:
+        (self.value,) = state
+
 
 class Name(Field):
     """Ім'я — без додаткової валідації."""
-    pass
+    __slots__ = ()
 
 
 class Phone(Field):
     """Телефон — рівно 10 цифр, без інших символів."""
+    __slots__ = ()
+
     def __init__(self, value: str):
         raw = value.strip()
-        if not (raw.isdigit() and len(raw) == 10):
+        if not _PHONE_RE.match(raw):
             raise ValueError("Номер телефону має складатися рівно з 10 цифр.")
         super().__init__(raw)
 
@@ -34,15 +52,42 @@ class Phone(Field):
 class Birthday(Field):
     """
     День народження у форматі DD.MM.YYYY.
-    Клас має лише поле value (рядок). Валідація і нормалізація під час ініціалізації.
+    value — нормалізований рядок; розпарсена дата кешується в _date,
+    щоб не викликати strptime повторно.
+    Незмінний: один екземпляр спільний для записів з однаковою датою (див. _make_birthday).
     """
+    __slots__ = ("_date", "_md")
+
     def __init__(self, value: str):
         try:
             dt = datetime.strptime(value.strip(), "%d.%m.%Y").date()
         except ValueError:
             raise ValueError("Invalid date format. Use DD.MM.YYYY")
-        normalized = dt.strftime("%d.%m.%Y")
-        super().__init__(normalized)
+        self._init(dt.strftime("%d.%m.%Y"), dt)
+
+    def _init(self, value: str, dt: date) -> None:
+        # Оминаємо заборону __setattr__ лише тут — під час створення/unpickle
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "_date", dt)
+        object.__setattr__(self, "_md", (dt.month, dt.day))
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("Birthday is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Birthday is immutable")
+
+    def __getstate__(self) -> tuple:
+        return (self.value, self._date)
+
+    def __setstate__(self, state: tuple) -> None:
+        self._init(*state)  # _md похідне від _date — не зберігаємо
+
+
+@functools.lru_cache(maxsize=4096)
+def _make_birthday(value: str) -> Birthday:
+    """Спільний екземпляр Birthday для однакових рядків (Birthday не змінюється після створення)."""
+    return Birthday(value)
 
 
 # ============================
@@ -53,66 +98,114 @@ class Record:
     """
     Один контакт: ім'я, список телефонів, опційно день народження.
     """
+    __slots__ = ("name", "phones", "_phone_set", "birthday")
+
     def __init__(self, name: str):
         self.name = Name(name)
-        self.phones: List[Phone] = []
+        self.phones: List[str] = []  # вже перевірені через Phone номери
+        self._phone_set: Set[str] = set()  # ті самі номери, що й у phones, для O(1) пошуку
         self.birthday: Optional[Birthday] = None
 
     # --- робота з телефонами ---
     def add_phone(self, phone: str) -> None:
-        p = Phone(phone)
-        if any(ph.value == p.value for ph in self.phones):
+        cleaned = Phone(phone).value
+        if cleaned in self._phone_set:
             return
-        self.phones.append(p)
+        self.phones.append(cleaned)
+        self._phone_set.add(cleaned)
 
     def remove_phone(self, phone: str) -> None:
         cleaned = Phone(phone).value  # перевірка формату + нормалізація
-        for i, ph in enumerate(self.phones):
-            if ph.value == cleaned:
-                del self.phones[i]
-                return
-        raise ValueError("Цього номеру немає у контакті.")
+        if cleaned not in self._phone_set:
+            raise ValueError("Цього номеру немає у контакті.")
+        self.phones.remove(cleaned)
+        self._phone_set.discard(cleaned)
 
     def edit_phone(self, old: str, new: str) -> None:
         old_clean = Phone(old).value
-        new_phone = Phone(new)
-        for ph in self.phones:
-            if ph.value == old_clean:
-                ph.value = new_phone.value
-                return
-        raise ValueError("Старий номер не знайдено у контакті.")
+        new_clean = Phone(new).value
+        if old_clean not in self._phone_set:
+            raise ValueError("Старий номер не знайдено у контакті.")
+        if new_clean in self._phone_set and new_clean != old_clean:
+            # новий номер уже є — просто прибираємо старий, щоб не було дубля
+            self.remove_phone(old_clean)
+            return
+        self.phones[self.phones.index(old_clean)] = new_clean
+        self._phone_set.discard(old_clean)
+        self._phone_set.add(new_clean)
 
     # --- робота з днем народження ---
     def add_birthday(self, birthday_str: str) -> None:
         if self.birthday is not None:
             raise ValueError("День народження вже задано для цього контакту.")
-        self.birthday = Birthday(birthday_str)
+        self.birthday = _make_birthday(birthday_str)
 
     def birthday_str(self) -> Optional[str]:
         return str(self.birthday) if self.birthday else None
 
     def __str__(self) -> str:
-        phones = ", ".join(ph.value for ph in self.phones) if self.phones else "—"
+        phones = ", ".join(self.phones) if self.phones else "—"
         bday = self.birthday.value if self.birthday else "—"
         return f"{self.name.value}: phones [{phones}] | birthday [{bday}]"
 
 
-class AddressBook(UserDict):
+# Зсув за weekday(): субота (5) → +2, неділя (6) → +1, до понеділка
+_WEEKEND_SHIFT = (timedelta(0),) * 5 + (timedelta(days=2), timedelta(days=1))
+
+
+class AddressBook(dict):
     """
     Адресна книга з пошуком/додаванням записів + метод get_upcoming_birthdays.
-    data: Dict[str, Record], ключ — ім'я у первісному регістрі.
+    Сама є dict[str, Record], ключ — ім'я у первісному регістрі.
+    _with_bday — лише записи з днем народження, щоб не сканувати решту.
+    _ci — ім'я в нижньому регістрі → ключ, для пошуку без урахування регістру.
+    _seq — ключ → порядковий номер вставки (порядок контактів у книзі).
+    Записи змінюються лише через add_record/delete/set_birthday — вони й оновлюють
+    індекси; читання йде напряму через dict.
     """
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._with_bday: Dict[str, Record] = {}
+        self._ci: Dict[str, str] = {}
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        for record in dict(*args, **kwargs).values():  # початкові записи — з індексацією
+            self.add_record(record)
+
     def add_record(self, record: Record) -> None:
-        self.data[record.name.value] = record
+        name = record.name.value
+        key = self._ci.get(name.lower())
+        if key is None:
+            key = name
+            self._ci[name.lower()] = key
+            self._seq[key] = self._next_seq
+            self._next_seq += 1
+        # Запис з тим самим ім'ям (будь-який регістр) замінюємо на місці, під наявним ключем
+        self[key] = record
+        if record.birthday:
+            self._with_bday[key] = record
+        else:
+            self._with_bday.pop(key, None)
+
+    def set_birthday(self, record: Record, birthday_str: str) -> None:
+        """Задає ДН запису з книги й додає його до індексу _with_bday."""
+        key = self._ci.get(record.name.value.lower())
+        if key is None or self.get(key) is not record:
+            raise KeyError("Контакт не знайдено в адресній книзі.")
+        record.add_birthday(birthday_str)
+        self._with_bday[key] = record
 
     def find(self, name: str) -> Optional[Record]:
-        return self.data.get(name)
+        canon = self._ci.get(name.lower())
+        return self.get(canon) if canon else None
 
     def delete(self, name: str) -> None:
-        if name in self.data:
-            del self.data[name]
-        else:
+        key = self._ci.pop(name.lower(), None)
+        if key is None:
             raise KeyError("Контакт з таким іменем не знайдено.")
+        del self[key]
+        self._with_bday.pop(key, None)
+        del self._seq[key]
 
     # ---- Головний метод з автоперевірки (тиждень 3) ----
     def get_upcoming_birthdays(self, days: int = 7) -> List[Dict[str, str]]:
@@ -121,40 +214,62 @@ class AddressBook(UserDict):
         для днів народження, які трапляються протягом наступних `days` днів включно з сьогодні.
         Якщо ДН на вихідних — переносимо привітання на найближчий понеділок.
         """
-        today = date.today()
-        end_date = today + timedelta(days=days - 1)
-
-        result: List[Dict[str, str]] = []
-
-        for rec in self.data.values():
-            if not rec.birthday:
-                continue
-
-            # Парсимо з value щоразу (у класі Birthday зберігаємо тільки value)
-            bday = datetime.strptime(rec.birthday.value, "%d.%m.%Y").date()
+        allowed = self._greet_dates(days)
+
+        # Форматуємо кожну дату вікна один раз, а не для кожного запису
+        fmt_cache: Dict[date, str] = {
+            d: d.strftime("%d.%m.%Y") for d in set(allowed.values())
+        }
+
+        found: List[Tuple[date, int, str]] = []
+        lookup = allowed.get
+        append = found.append
+        seq = self._seq
+
+        for key, rec in self._with_bday.items():
+            greet_date = lookup(rec.birthday._md)
+            if greet_date:
+                append((greet_date, seq[key], rec.name.value))
+
+        # Сортуємо за вже готовими date, а в межах дати — у порядку книги
+        found.sort(key=itemgetter(0, 1))
+        return [
+            {"name": name, "birthday": fmt_cache[greet_date]}
+            for greet_date, _, name in found
+        ]
+
+    def get_upcoming_birthdays_grouped(self, days: int = 7) -> List[Tuple[date, List[str]]]:
+        """
+        Те саме вікно, що й get_upcoming_birthdays, але згруповане за датою привітання
+        під час одного проходу: [(date, [імена]), ...], відсортоване за date.
+        Порядок імен у групі не визначено — впорядковує той, хто показує.
+        """
+        lookup = self._greet_dates(days).get
+        grouped: Dict[date, List[str]] = {}
 
-            bday_this_year = bday.replace(year=today.year)
-            if bday_this_year < today:
-                bday_this_year = bday_this_year.replace(year=today.year + 1)
+        for rec in self._with_bday.values():
+            greet_date = lookup(rec.birthday._md)
+            if greet_date:
+                grouped.setdefault(greet_date, []).append(rec.name.value)
 
-            if today <= bday_this_year <= end_date:
-                greet_date = self._shift_if_weekend(bday_this_year)
-                result.append({
-                    "name": rec.name.value,
-                    "birthday": greet_date.strftime("%d.%m.%Y")
-                })
+        return sorted(grouped.items())
 
-        result.sort(key=lambda x: datetime.strptime(x["birthday"], "%d.%m.%Y").date())
-        return result
+    def _greet_dates(self, days: int) -> Dict[Tuple[int, int], date]:
+        """
+        (місяць, день) → дата привітання (вже з перенесенням з вихідних)
+        для кожного дня вікна; перевірка запису зводиться до одного пошуку в dict.
+        """
+        today = date.today()
+        allowed: Dict[Tuple[int, int], date] = {}
+        for i in range(days):
+            d = today + timedelta(days=i)
+            if (d.month, d.day) not in allowed:
+                allowed[(d.month, d.day)] = self._shift_if_weekend(d)
+        return allowed
 
     @staticmethod
     def _shift_if_weekend(d: date) -> date:
-        # 5 = Saturday, 6 = Sunday
-        if d.weekday() == 5:
-            return d + timedelta(days=2)
-        if d.weekday() == 6:
-            return d + timedelta(days=1)
-        return d
+        return d + _WEEKEND_SHIFT[d.weekday()]
 
 
 # ============================
@@ -185,10 +300,9 @@ def parse_input(user_input: str) -> Tuple[str, List[str]]:
     user_input = user_input.strip()
     if not user_input:
         return "", []
-    parts = user_input.split()
-    command = parts[0].lower()
-    args = parts[1:]
-    return command, args
+    # Відокремлюємо лише команду; хвіст ділимо, тільки якщо він є
+    command, *rest = user_input.split(maxsplit=1)
+    return command.lower(), rest[0].split() if rest else []
 
 
 # ============================
@@ -223,16 +337,16 @@ def show_phone(args: List[str], book: AddressBook) -> str:
     record = book.find(name)
     if not record.phones:  # якщо record=None → AttributeError → декоратор
         return "У контакту немає телефонів."
-    return ", ".join(ph.value for ph in record.phones)
+    return ", ".join(record.phones)
 
 
 @input_error
 def show_all(_: List[str], book: AddressBook) -> str:
-    if not book.data:
+    if not book:
         return "Адресна книга порожня."
     lines = []
     for rec in book.values():
-        phones = ", ".join(ph.value for ph in rec.phones) if rec.phones else "—"
+        phones = ", ".join(rec.phones) if rec.phones else "—"
         bday = rec.birthday.value if rec.birthday else "—"
         lines.append(f"{rec.name.value}: {phones}; birthday: {bday}")
     return "\n".join(lines)
@@ -242,7 +356,7 @@ def show_all(_: List[str], book: AddressBook) -> str:
 def add_birthday(args: List[str], book: AddressBook) -> str:
     name, bday_str, *_ = args
     record = book.find(name)
-    record.add_birthday(bday_str)  # якщо record=None → AttributeError → декоратор
+    book.set_birthday(record, bday_str)  # якщо record=None → AttributeError → декоратор
     return "Birthday added."
 
 
@@ -257,22 +371,14 @@ def show_birthday(args: List[str], book: AddressBook) -> str:
 
 @input_error
 def birthdays(args: List[str], book: AddressBook) -> str:
-    upcoming = book.get_upcoming_birthdays(days=7)
-    if not upcoming:
+    grouped = book.get_upcoming_birthdays_grouped(days=7)
+    if not grouped:
         return "Найближчими 7 днями іменин немає."
 
-    by_date: Dict[str, List[str]] = {}
-    for item in upcoming:
-        by_date.setdefault(item["birthday"], []).append(item["name"])
-
-    def parse_d(d: str) -> date:
-        return datetime.strptime(d, "%d.%m.%Y").date()
-
-    lines = []
-    for d_str in sorted(by_date.keys(), key=parse_d):
-        names = ", ".join(sorted(by_date[d_str]))
-        weekday = parse_d(d_str).strftime("%A")
-        lines.append(f"{d_str} ({weekday}): {names}")
+    lines = [
+        f"{d.strftime('%d.%m.%Y')} ({d.strftime('%A')}): {', '.join(sorted(names))}"
+        for d, names in grouped
+    ]
     return "\n".join(lines)
 
 
@@ -280,46 +386,83 @@ def birthdays(args: List[str], book: AddressBook) -> str:
 # Головна петля
 # ============================
 
-def main():
-    book = AddressBook()
-    print("Welcome to the assistant bot!")
-    while True:
-        user_input = input("Enter a command: ").strip()
-        if not user_input:
-            continue
+_COMMANDS: Dict[str, Callable[[List[str], AddressBook], str]] = {
+    "hello": lambda *_: "How can I help you?",
+    "add": add_contact,
+    "change": change_phone,
+    "phone": show_phone,
+    "all": show_all,
+    "add-birthday": add_birthday,
+    "show-birthday": show_birthday,
+    "birthdays": birthdays,
+}
 
-        command, args = parse_input(user_input)
+_EXIT_COMMANDS = frozenset({"close", "exit"})
 
-        if command in ["close", "exit"]:
-            print("Good bye!")
-            break
+BOOK_FILE = "book.pkl"
 
-        elif command == "hello":
-            print("How can I help you?")
 
-        elif command == "add":
-            print(add_contact(args, book))
+def _read_lines() -> Iterator[str]:
+    """Інтерактивно — input() з підказкою; з пайпа/файлу — буферизоване читання sys.stdin."""
+    if not sys.stdin.isatty():
+        yield from sys.stdin
+        return
+    while True:
+        try:
+            yield input("Enter a command: ")
+        except EOFError:
+            return
 
-        elif command == "change":
-            print(change_phone(args, book))
 
-        elif command == "phone":
-            print(show_phone(args, book))
+def load_book(path: str = BOOK_FILE) -> AddressBook:
+    """
+    Завантажує книгу з pickle-файлу; якщо файлу ще немає — порожня книга.
+    Пошкоджений файл переносимо в path + ".bak", щоб збереження на виході його не затерло.
+    """
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return AddressBook()
+    except (EOFError, pickle.UnpicklingError):
+        backup = path + ".bak"
+        os.replace(path, backup)
+        print(f"Файл {path} пошкоджено — збережено як {backup}, починаємо з порожньої книги.")
+        return AddressBook()
+
+
+def save_book(book: AddressBook, path: str = BOOK_FILE) -> None:
+    """Пише у тимчасовий файл і атомарно підміняє ним path — збій посеред запису не псує книгу."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(book, f, protocol=5)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
 
-        elif command == "all":
-            print(show_all(args, book))
 
-        elif command == "add-birthday":
-            print(add_birthday(args, book))
+def main():
+    book = load_book()
+    print("Welcome to the assistant bot!")
+    try:
+        for line in _read_lines():
+            user_input = line.strip()
+            if not user_input:
+                continue
 
-        elif command == "show-birthday":
-            print(show_birthday(args, book))
+            command, args = parse_input(user_input)
 
-        elif command == "birthdays":
-            print(birthdays(args, book))
+            if command in _EXIT_COMMANDS:
+                print("Good bye!")
+                break
 
-        else:
-            print("Invalid command.")
+            handler = _COMMANDS.get(command)
+            if handler:
+                print(handler(args, book))
+            else:
+                print("Invalid command.")
+    finally:
+        save_book(book)  # і після Ctrl+C / EOF / помилки
 
 
 if __name__ == "__main__":